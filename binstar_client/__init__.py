@@ -1,6 +1,7 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
 import collections
+import io
 import os
 import requests
 import warnings
@@ -10,12 +11,18 @@ import platform
 from six import raise_from
 from six.moves.urllib.parse import quote
 
+try:
+    import certifi
+except ImportError:
+    certifi = None
+
 # For backwards compatibility
 from .errors import *
 from .requests_ext import stream_multipart, NullAuth
 
-from .utils import compute_hash, jencode, pv
-from .utils.http_codes import STATUS_CODES
+from .utils import compute_hash, jencode, pv, _loads
+from .utils.http_codes import (STATUS_CODES, ALLOWED_OK, ALLOWED_CREATED,
+                               ALLOWED_DOWNLOAD)
 
 from .mixins.organizations import OrgMixin
 from .mixins.channels import ChannelsMixin
@@ -25,11 +32,43 @@ from . import errors
 
 logger = logging.getLogger('binstar')
 
+#: Session shared by all clients for S3 (and other off-domain) transfers, so
+#: repeated uploads/downloads reuse the same TCP+TLS connections instead of
+#: paying a fresh handshake per file.  It deliberately carries none of the
+#: Binstar auth headers.
+_S3_SESSION = None
+
+
+def _token_header(token):
+    # Pre-encode the value once so requests hands it straight to the header
+    # serializer instead of re-encoding the str on every request.
+    if not isinstance(token, bytes):
+        token = token.encode('ascii')
+    return b'token ' + token
+
+
+def _s3_session():
+    global _S3_SESSION
+    if _S3_SESSION is None:
+        session = requests.Session()
+        if certifi is not None:
+            session.verify = certifi.where()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                                                max_retries=3)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _S3_SESSION = session
+    return _S3_SESSION
+
 from ._version import get_versions
 
 __version__ = get_versions()['version']
 del get_versions
 
+# Parsed once; _check_response compares the server's api version against it
+# on every response.
+_OWN_VERSION = pv(__version__)
+
 
 class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
     """
@@ -39,23 +78,40 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
                   an anonymous user.
     """
 
+    # Endpoint templates shared by the hot URL builders below; hoisted to
+    # class level so each call formats a constant instead of rebuilding the
+    # pattern inline.
+    _URL_PACKAGE = '{}/package/{}/{}'
+    _URL_RELEASE = '{}/release/{}/{}/{}'
+    _URL_DIST = '{}/dist/{}/{}/{}/{}'
+    _URL_DOWNLOAD = '{}/download/{}/{}/{}/{}'
+    _URL_STAGE = '{}/stage/{}/{}/{}/{}'
+    _URL_COMMIT = '{}/commit/{}/{}/{}/{}'
+
     def __init__(self, token=None, domain='https://api.anaconda.org', verify=True, **kwargs):
         self._session = requests.Session()
         self._session.headers['x-binstar-api-version'] = __version__
+        if verify is True and certifi is not None:
+            # Resolve the CA bundle path once up front; every connection then
+            # reuses the same SSL context instead of re-locating the default
+            # bundle, and session resumption can kick in across requests.
+            verify = certifi.where()
         self.session.verify = verify
         self.session.auth = NullAuth()
         self.token = token
         self._token_warning_sent = False
+        self._etag_cache = collections.OrderedDict()
 
         user_agent = 'Anaconda-Client/{} (+https://anaconda.org)'.format(__version__)
         self._session.headers.update({
             'User-Agent': user_agent,
             'Content-Type':'application/json',
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
         })
 
         if token:
-            self._session.headers.update({'Authorization': 'token {}'.format(token)})
+            self._session.headers['Authorization'] = _token_header(token)
 
         if domain.endswith('/'):
             domain = domain[:-1]
@@ -142,17 +198,14 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
                    'strength': strength,
                    'fail-if-exists': fail_if_already_exists}
 
-        data, headers = jencode(payload)
-        res = self.session.post(url, auth=auth, data=data, headers=headers)
-        self._check_response(res)
-        res = res.json()
+        res = self._post_json(url, payload, auth=auth)
         token = res['token']
-        self.session.headers.update({'Authorization': 'token %s' % (token)})
+        self.session.headers['Authorization'] = _token_header(token)
         return token
 
     def list_scopes(self):
         url = '%s/scopes' % (self.domain)
-        res = requests.get(url)
+        res = self.session.get(url)
         self._check_response(res)
         return res.json()
 
@@ -188,11 +241,11 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
             url = '%s/authentications' % (self.domain,)
 
         res = self.session.delete(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
-    def _check_response(self, res, allowed=[200]):
+    def _check_response(self, res, allowed=ALLOWED_OK):
         api_version = res.headers.get('x-binstar-api-version', '0.2.1')
-        if pv(api_version) > pv(__version__):
+        if pv(api_version) > _OWN_VERSION:
             logger.warning('The api server is running the binstar-api version %s. you are using %s\nPlease update your '
                            'client with pip install -U binstar or conda update binstar' % (api_version, __version__))
 
@@ -206,28 +259,80 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         if 'X-Anaconda-Read-Only' in res.headers:
             logger.warning('Anaconda repository is currently in READ ONLY mode.')
 
-        if not res.status_code in allowed:
-            short, long = STATUS_CODES.get(res.status_code, ('?', 'Undefined error'))
-            msg = '%s: %s ([%s] %s -> %s)' % (short, long, res.request.method, res.request.url, res.status_code)
+        if res.status_code in allowed:
+            return
 
-            try:
-                data = res.json()
-            except:
-                pass
-            else:
-                msg = data.get('error', msg)
+        short, long = STATUS_CODES.get(res.status_code, ('?', 'Undefined error'))
+        msg = '%s: %s ([%s] %s -> %s)' % (short, long, res.request.method, res.request.url, res.status_code)
+
+        try:
+            data = _loads(res.content)
+        except ValueError:
+            # Covers orjson.JSONDecodeError as well; both subclass ValueError.
+            pass
+        else:
+            msg = data.get('error', msg)
+
+        ErrCls = errors.BinstarError
+        if res.status_code == 401:
+            ErrCls = errors.Unauthorized
+        elif res.status_code == 404:
+            ErrCls = errors.NotFound
+        elif res.status_code == 409:
+            ErrCls = errors.Conflict
+        elif res.status_code >= 500:
+            ErrCls = errors.ServerError
+
+        raise ErrCls(msg, res.status_code)
+
+    def _post_json(self, url, payload, allowed=ALLOWED_OK, **kwargs):
+        '''
+        Serialize `payload`, POST it to `url` and return the parsed response
+        body. The server accepts raw JSON bodies, so the encoded bytes feed
+        the request directly with no further wrapping.
+        '''
+        data, headers = jencode(payload)
+        res = self.session.post(url, data=data, headers=headers, **kwargs)
+        self._check_response(res, allowed)
+        return _loads(res.content)
 
-            ErrCls = errors.BinstarError
-            if res.status_code == 401:
-                ErrCls = errors.Unauthorized
-            elif res.status_code == 404:
-                ErrCls = errors.NotFound
-            elif res.status_code == 409:
-                ErrCls = errors.Conflict
-            elif res.status_code >= 500:
-                ErrCls = errors.ServerError
+    #: Maximum number of URLs retained in the per-client ETag cache.
+    _ETAG_CACHE_SIZE = 64
 
-            raise ErrCls(msg, res.status_code)
+    def _cached_get(self, url, cache_key=None, **kwargs):
+        '''
+        GET `url`, revalidating any previously cached response with
+        If-None-Match. A 304 reply re-parses the cached body, skipping the
+        transfer; a 200 refreshes the cache.
+
+        The raw bytes are cached rather than the parsed value so every call
+        returns a fresh parse that callers may mutate freely, and the cache
+        is a small LRU so a long-lived client cannot grow it without bound.
+
+        :param cache_key: (optional) key to cache under instead of `url`;
+                          callers whose response varies with more than the
+                          URL must fold the extra inputs into this key.
+        '''
+        cache_key = cache_key or url
+        entry = self._etag_cache.pop(cache_key, None)
+        if entry is not None:
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers['If-None-Match'] = entry[0]
+            kwargs['headers'] = headers
+
+        res = self.session.get(url, **kwargs)
+        if entry is not None and res.status_code == 304:
+            self._etag_cache[cache_key] = entry
+            return _loads(entry[1])
+
+        self._check_response(res)
+        data = _loads(res.content)
+        etag = res.headers.get('ETag')
+        if etag:
+            self._etag_cache[cache_key] = (etag, res.content)
+            while len(self._etag_cache) > self._ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return data
 
     def user(self, login=None):
         '''
@@ -241,10 +346,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         else:
             url = '%s/user' % (self.domain)
 
-        res = self.session.get(url, verify=self.session.verify)
-        self._check_response(res)
-
-        return res.json()
+        return self._cached_get(url)
 
     def user_packages(
             self,
@@ -290,6 +392,30 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
 
         return res.json()
 
+    def user_packages_full(self, login=None, max_workers=8, **filters):
+        '''
+        Fetch the full package record for every package of a user.
+
+        Issues the per-package lookups concurrently over the pooled session,
+        so N packages cost roughly one round-trip of wall time instead of N
+        sequential `package()` calls.
+
+        :param login: (optional) the login name of the user or None for the
+                      authenticated user.
+        :param max_workers: number of concurrent requests to issue.
+        :param filters: extra keyword arguments forwarded to `user_packages`.
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        if login is None:
+            login = self.user()['login']
+
+        packages = self.user_packages(login=login, **filters)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda pkg: self.package(login, pkg['name']), packages))
+
     def package(self, login, package_name):
         '''
         Get information about a specific package
@@ -297,28 +423,26 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param login: the login of the package owner
         :param package_name: the name of the package
         '''
-        url = '%s/package/%s/%s' % (self.domain, login, package_name)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
+        url = self._URL_PACKAGE.format(self.domain, login, package_name)
+        return self._cached_get(url)
 
     def package_add_collaborator(self, owner, package_name, collaborator):
         url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
         res = self.session.put(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
         return
 
     def package_remove_collaborator(self, owner, package_name, collaborator):
         url = '%s/packages/%s/%s/collaborators/%s' % (self.domain, owner, package_name, collaborator)
         res = self.session.delete(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
         return
 
     def package_collaborators(self, owner, package_name):
 
         url = '%s/packages/%s/%s/collaborators' % (self.domain, owner, package_name)
         res = self.session.get(url)
-        self._check_response(res, [200])
+        self._check_response(res)
         return res.json()
 
     def all_packages(self, modified_after=None):
@@ -326,9 +450,34 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         '''
         url = '%s/package_listing' % (self.domain)
         data = {'modified_after':modified_after or ''}
-        res = self.session.get(url, data=data)
+        # The listing varies with modified_after, which travels in the
+        # request body, so it must be part of the cache key.
+        return self._cached_get(url, cache_key=(url, modified_after or ''), data=data)
+
+    def iter_all_packages(self, modified_after=None):
+        '''
+        Iterate over the full package listing, yielding one package record
+        at a time.
+
+        When ijson is installed the response is parsed incrementally while it
+        streams in, keeping peak memory at one record instead of the whole
+        listing; otherwise the body is parsed in one go.
+        '''
+        url = '%s/package_listing' % (self.domain)
+        data = {'modified_after': modified_after or ''}
+        res = self.session.get(url, data=data, stream=True)
         self._check_response(res)
-        return res.json()
+
+        try:
+            import ijson
+        except ImportError:
+            for package in _loads(res.content):
+                yield package
+        else:
+            # Let urllib3 decompress the body as ijson reads from it.
+            res.raw.decode_content = True
+            for package in ijson.items(res.raw, 'item'):
+                yield package
 
 
     def add_package(self, login, package_name,
@@ -351,7 +500,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param public: if true then the package will be hosted publicly
         :param attrs: A dictionary of extra attributes for this package
         '''
-        url = '%s/package/%s/%s' % (self.domain, login, package_name)
+        url = self._URL_PACKAGE.format(self.domain, login, package_name)
 
         attrs = attrs or {}
         attrs['summary'] = summary
@@ -367,17 +516,14 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
                        public_attrs=dict(attrs or {})
                        )
 
-        data, headers = jencode(payload)
-        res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res)
-        return res.json()
+        return self._post_json(url, payload)
 
     def remove_package(self, username, package_name):
 
-        url = '%s/package/%s/%s' % (self.domain, username, package_name)
+        url = self._URL_PACKAGE.format(self.domain, username, package_name)
 
         res = self.session.delete(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
         return
 
     def release(self, login, package_name, version):
@@ -388,10 +534,8 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param package_name: the name of the package
         :param version: the name of the package
         '''
-        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
-        res = self.session.get(url)
-        self._check_response(res)
-        return res.json()
+        url = self._URL_RELEASE.format(self.domain, login, package_name, version)
+        return self._cached_get(url)
 
     def remove_release(self, username, package_name, version):
         '''
@@ -401,9 +545,9 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param package_name: the name of the package
         :param version: the name of the package
         '''
-        url = '%s/release/%s/%s/%s' % (self.domain, username, package_name, version)
+        url = self._URL_RELEASE.format(self.domain, username, package_name, version)
         res = self.session.delete(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
         return
 
     def add_release(self, login, package_name, version, requirements, announce, release_attrs):
@@ -417,7 +561,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param announce: An announcement that will be posted to all package watchers
         '''
 
-        url = '%s/release/%s/%s/%s' % (self.domain, login, package_name, version)
+        url = self._URL_RELEASE.format(self.domain, login, package_name, version)
 
         if not release_attrs:
             release_attrs = {}
@@ -429,14 +573,11 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         }
         payload.update(release_attrs)
 
-        data, headers = jencode(payload)
-        res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res)
-        return res.json()
+        return self._post_json(url, payload)
 
     def distribution(self, login, package_name, release, basename=None):
 
-        url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+        url = self._URL_DIST.format(self.domain, login, package_name, release, basename)
 
         res = self.session.get(url)
         self._check_response(res)
@@ -445,7 +586,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
     def remove_dist(self, login, package_name, release, basename=None, _id=None):
 
         if basename:
-            url = '%s/dist/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+            url = self._URL_DIST.format(self.domain, login, package_name, release, basename)
         elif _id:
             url = '%s/dist/%s/%s/%s/-/%s' % (self.domain, login, package_name, release, _id)
         else:
@@ -456,7 +597,53 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         return res.json()
 
 
-    def download(self, login, package_name, release, basename, md5=None):
+    def _download_ranges(self, location, parallel):
+        '''
+        Fetch `location` as `parallel` concurrent Range requests through the
+        pooled S3 session and return the assembled body as a file like
+        object, or None if the server does not support ranged downloads.
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        session = _s3_session()
+        head = session.head(location)
+        length = head.headers.get('Content-Length')
+        if not length or head.headers.get('Accept-Ranges', 'none') == 'none':
+            return None
+
+        length = int(length)
+        if length <= 0:
+            # Nothing to split; let the caller use the single-stream path.
+            return None
+
+        chunk = -(-length // parallel)
+        spans = [(start, min(start + chunk, length) - 1)
+                 for start in range(0, length, chunk)]
+
+        buf = bytearray(length)
+
+        def fetch(span):
+            start, end = span
+            res = session.get(location,
+                              headers={'Range': 'bytes=%d-%d' % (start, end)})
+            if res.status_code != 206 or len(res.content) != end - start + 1:
+                # The server ignored or mis-served the Range header; the
+                # caller falls back to the single-stream download. The length
+                # check matters: slice-assigning a short body would resize
+                # the buffer and shift every chunk written after it.
+                raise errors.BinstarError('Ranged download not supported',
+                                          res.status_code)
+            buf[start:end + 1] = res.content
+
+        try:
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                list(executor.map(fetch, spans))
+        except errors.BinstarError:
+            return None
+
+        return io.BytesIO(bytes(buf))
+
+    def download(self, login, package_name, release, basename, md5=None, parallel=1):
         '''
         Download a package distribution
 
@@ -466,18 +653,22 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param basename: the basename of the distribution to download
         :param md5: (optional) an md5 hash of the download if given and the package has not changed
                     None will be returned
+        :param parallel: (optional) fetch the redirected (S3) download as this many
+                         concurrent Range requests. The default of 1 streams the
+                         response; with parallel > 1 the body is assembled in memory
+                         and returned as a file like object
 
         :returns: a file like object or None
         '''
 
-        url = '%s/download/%s/%s/%s/%s' % (self.domain, login, package_name, release, basename)
+        url = self._URL_DOWNLOAD.format(self.domain, login, package_name, release, basename)
         if md5:
             headers = {'ETag':md5, }
         else:
             headers = {}
 
         res = self.session.get(url, headers=headers, allow_redirects=False)
-        self._check_response(res, allowed=[200, 302, 304])
+        self._check_response(res, allowed=ALLOWED_DOWNLOAD)
 
         if res.status_code == 200:
             # We received the content directly from anaconda.org
@@ -486,11 +677,18 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
             # The content has not changed
             return None
         elif res.status_code == 302:
+            location = res.headers['location']
+
+            if parallel > 1:
+                body = self._download_ranges(location, parallel)
+                if body is not None:
+                    return body
+
             # Download from s3:
-            # We need to create a new request (without using session) to avoid
+            # We need to use the pooled S3 session (not self.session) to avoid
             # sending the custom headers set on our session to S3 (which causes
             # a failure).
-            res2 = requests.get(res.headers['location'], stream=True)
+            res2 = _s3_session().get(location, stream=True)
             return res2
 
 
@@ -509,7 +707,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         :param attrs: any extra attributes about the file (eg. build=1, pyversion='2.7', os='osx')
 
         '''
-        url = '%s/stage/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
+        url = self._URL_STAGE.format(self.domain, login, package_name, release, quote(basename))
         if attrs is None:
             attrs = {}
         if not isinstance(attrs, dict):
@@ -518,10 +716,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         payload = dict(distribution_type=distribution_type, description=description, attrs=attrs,
                        dependencies=dependencies, channels=channels)
 
-        data, headers = jencode(payload)
-        res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res)
-        obj = res.json()
+        obj = self._post_json(url, payload)
 
         s3url = obj['post_url']
         s3data = obj['form_data']
@@ -540,7 +735,7 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
         data_stream, headers = stream_multipart(s3data, files={'file':(basename, fd)},
                                                 callback=callback)
 
-        request_method = self.session if s3url.startswith(self.domain) else requests
+        request_method = self.session if s3url.startswith(self.domain) else _s3_session()
         s3res = request_method.post(
             s3url, data=data_stream,
             verify=self.session.verify, timeout=10 * 60 * 60,
@@ -553,13 +748,10 @@ class Binstar(OrgMixin, ChannelsMixin, PackageMixin):
             logger.info('')
             raise errors.BinstarError('Error uploading package', s3res.status_code)
 
-        url = '%s/commit/%s/%s/%s/%s' % (self.domain, login, package_name, release, quote(basename))
+        url = self._URL_COMMIT.format(self.domain, login, package_name, release, quote(basename))
         payload = dict(dist_id=obj['dist_id'])
-        data, headers = jencode(payload)
-        res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res)
 
-        return res.json()
+        return self._post_json(url, payload)
 
     def search(self, query, package_type=None, platform=None):
         url = '%s/search' % self.domain
@@ -5,6 +5,7 @@ Created on May 2, 2014
 '''
 
 from binstar_client.utils import jencode
+from binstar_client.utils.http_codes import ALLOWED_CREATED
 from binstar_client.errors import BinstarError
 
 class ChannelsMixin(object):
@@ -16,7 +17,7 @@ class ChannelsMixin(object):
         url = '%s/channels/%s' % (self.domain, owner)
 
         res = self.session.get(url)
-        self._check_response(res, [200])
+        self._check_response(res)
         return res.json()
 
     def show_channel(self, channel, owner):
@@ -26,7 +27,7 @@ class ChannelsMixin(object):
         url = '%s/channels/%s/%s' % (self.domain, owner, channel)
 
         res = self.session.get(url)
-        self._check_response(res, [200])
+        self._check_response(res)
         return res.json()
 
     def add_channel(self, channel, owner, package=None, version=None, filename=None):
@@ -44,7 +45,7 @@ class ChannelsMixin(object):
         data, headers = jencode(package=package, version=version, basename=filename)
 
         res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
     def remove_channel(self, channel, owner, package=None, version=None, filename=None):
         '''
@@ -61,7 +62,7 @@ class ChannelsMixin(object):
         data, headers = jencode(package=package, version=version, basename=filename)
 
         res = self.session.delete(url, data=data, headers=headers)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
     def copy_channel(self, channel, owner, to_channel):
         '''
@@ -74,7 +75,7 @@ class ChannelsMixin(object):
         '''
         url = '%s/channels/%s/%s/copy/%s' % (self.domain, owner, channel, to_channel)
         res = self.session.post(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
     def lock_channel(self, channel, owner):
         '''
@@ -87,7 +88,7 @@ class ChannelsMixin(object):
         '''
         url = '%s/channels/%s/%s/lock' % (self.domain, owner, channel)
         res = self.session.post(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
     def unlock_channel(self, channel, owner):
         '''
@@ -100,5 +101,5 @@ class ChannelsMixin(object):
         '''
         url = '%s/channels/%s/%s/lock' % (self.domain, owner, channel)
         res = self.session.delete(url)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
 
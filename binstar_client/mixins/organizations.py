@@ -1,4 +1,5 @@
 from binstar_client.utils import jencode
+from binstar_client.utils.http_codes import ALLOWED_NO_CONTENT
 
 class OrgMixin(object):
 
@@ -41,37 +42,37 @@ class OrgMixin(object):
     def is_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
         res = self.session.get(url)
-        self._check_response(res, [204, 404])
+        self._check_response(res, (204, 404))
         return res.status_code == 204
 
     def add_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
         res = self.session.put(url)
-        self._check_response(res, [204])
+        self._check_response(res, ALLOWED_NO_CONTENT)
         return
 
     def remove_group_member(self, org, name, member):
         url = '%s/group/%s/%s/members/%s' % (self.domain, org, name, member)
         res = self.session.delete(url)
-        self._check_response(res, [204])
+        self._check_response(res, ALLOWED_NO_CONTENT)
         return
 
     def remove_group_package(self, org, name, package):
         url = '%s/group/%s/%s/packages/%s' % (self.domain, org, name, package)
         res = self.session.delete(url)
-        self._check_response(res, [204])
+        self._check_response(res, ALLOWED_NO_CONTENT)
         return
 
     def group_packages(self, org, name):
         url = '%s/group/%s/%s/packages' % (self.domain, org, name)
         res = self.session.get(url)
-        self._check_response(res, [200])
+        self._check_response(res)
         return res.json()
 
     def add_group_package(self, org, name, package):
         url = '%s/group/%s/%s/packages/%s' % (self.domain, org, name, package)
         res = self.session.put(url)
-        self._check_response(res, [204])
+        self._check_response(res, ALLOWED_NO_CONTENT)
         return
 
     def add_group(self, org, name, perms='read'):
@@ -81,7 +82,7 @@ class OrgMixin(object):
         data, headers = jencode(payload)
 
         res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res, [204])
+        self._check_response(res, ALLOWED_NO_CONTENT)
 
         return
 
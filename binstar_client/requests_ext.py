@@ -10,6 +10,13 @@ import requests
 
 from requests.packages.urllib3.filepost import choose_boundary, iter_fields
 
+try:
+    # requests_toolbelt streams multipart bodies in O(chunk) memory and
+    # computes Content-Length up front without buffering the file.
+    from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+except ImportError:
+    MultipartEncoder = MultipartEncoderMonitor = None
+
 logger = logging.getLogger('binstar.requests_ext')
 
 
@@ -141,6 +148,17 @@ def stream_multipart(data, files=None, callback=None):
     else:
         fields = data
 
+    if MultipartEncoder is not None:
+        # The encoder requires text values; the form fields must stay ordered
+        # so the 'file' part comes last, as S3 expects.
+        fields = [(name, six.text_type(value) if isinstance(value, six.integer_types) else value)
+                  for name, value in iter_fields(fields)]
+        body = MultipartEncoder(fields=fields)
+        if callback is not None:
+            body = MultipartEncoderMonitor(
+                body, lambda monitor: callback(monitor.bytes_read, monitor.len))
+        return body, {'Content-Type': body.content_type}
+
     body, content_type = encode_multipart_formdata_stream(fields)
     data = MultiPartIO(body, callback=callback)
     headers = {'Content-Type':content_type}
@@ -0,0 +1,114 @@
+import unittest
+
+import mock
+
+from binstar_client import Binstar
+from binstar_client.tests.urlmock import urlpatch
+
+
+class FakeResponse(object):
+    def __init__(self, status_code=200, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+class FakeS3Session(object):
+    '''
+    Stands in for the pooled S3 session, serving `body` and honoring Range
+    requests the way S3 does.
+    '''
+
+    def __init__(self, body, advertise_ranges=True, honor_ranges=True,
+                 content_length=True):
+        self.body = body
+        self.advertise_ranges = advertise_ranges
+        self.honor_ranges = honor_ranges
+        self.content_length = content_length
+        self.ranges_requested = []
+
+    def head(self, url, **kwargs):
+        headers = {}
+        if self.content_length:
+            headers['Content-Length'] = str(len(self.body))
+        if self.advertise_ranges:
+            headers['Accept-Ranges'] = 'bytes'
+        return FakeResponse(headers=headers)
+
+    def get(self, url, headers=None, **kwargs):
+        if self.honor_ranges and headers and 'Range' in headers:
+            spec = headers['Range'].split('=', 1)[1]
+            start, end = [int(part) for part in spec.split('-')]
+            self.ranges_requested.append((start, end))
+            return FakeResponse(status_code=206, content=self.body[start:end + 1])
+        return FakeResponse(content=self.body)
+
+
+class ShortRangeSession(FakeS3Session):
+    '''Serves 206 replies whose bodies are one byte short of the range.'''
+
+    def get(self, url, headers=None, **kwargs):
+        res = FakeS3Session.get(self, url, headers=headers, **kwargs)
+        if res.status_code == 206:
+            res.content = res.content[:-1]
+        return res
+
+
+class TestDownloadRanges(unittest.TestCase):
+    def ranged_download(self, session, parallel=4):
+        api = Binstar()
+        with mock.patch('binstar_client._s3_session', return_value=session):
+            return api._download_ranges('http://s3url.com/file1.tar.bz2', parallel)
+
+    def test_reassembles_ranges(self):
+        session = FakeS3Session(b'0123456789abcdef')
+        body = self.ranged_download(session, parallel=4)
+
+        self.assertEqual(body.read(), b'0123456789abcdef')
+        self.assertEqual(sorted(session.ranges_requested),
+                         [(0, 3), (4, 7), (8, 11), (12, 15)])
+
+    def test_uneven_split(self):
+        session = FakeS3Session(b'0123456789')
+        body = self.ranged_download(session, parallel=3)
+
+        self.assertEqual(body.read(), b'0123456789')
+
+    def test_zero_length_falls_back(self):
+        session = FakeS3Session(b'')
+        self.assertIsNone(self.ranged_download(session))
+
+    def test_missing_content_length_falls_back(self):
+        session = FakeS3Session(b'0123', content_length=False)
+        self.assertIsNone(self.ranged_download(session))
+
+    def test_no_range_support_falls_back(self):
+        session = FakeS3Session(b'0123', advertise_ranges=False)
+        self.assertIsNone(self.ranged_download(session))
+
+    def test_short_range_body_falls_back(self):
+        # A truncated 206 body must not be stitched into a corrupt file.
+        session = ShortRangeSession(b'0123456789abcdef')
+        self.assertIsNone(self.ranged_download(session))
+
+    def test_range_ignored_falls_back(self):
+        # The server advertises ranges but answers the Range request with 200.
+        session = FakeS3Session(b'0123', honor_ranges=False)
+        self.assertIsNone(self.ranged_download(session))
+
+    @urlpatch
+    def test_download_parallel(self, urls):
+        api = Binstar()
+        urls.register(method='GET', path='/download/u1/p1/1.0/file1.tar.bz2', status=302,
+                      headers={'location': 'http://s3url.com/file1.tar.bz2'})
+
+        session = FakeS3Session(b'0123456789')
+        with mock.patch('binstar_client._s3_session', return_value=session):
+            body = api.download('u1', 'p1', '1.0', 'file1.tar.bz2', parallel=2)
+
+        self.assertEqual(body.read(), b'0123456789')
+        urls.assertAllCalled()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,82 @@
+import io
+import sys
 import unittest
 
+import mock
+import requests
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 from binstar_client.tests.urlmock import urlpatch
 from binstar_client import Binstar
 
 
+class RawBody(io.BytesIO):
+    '''A response body stream that accepts the decode_content flag.'''
+    decode_content = False
+
+
+class TestIterAllPackages(unittest.TestCase):
+    @urlpatch
+    def test_fallback_parse(self, urls):
+        api = Binstar()
+        urls.register(method='GET', path='/package_listing',
+                      content='[{"name": "p1"}, {"name": "p2"}]')
+
+        # Force the no-ijson branch regardless of the environment.
+        with mock.patch.dict(sys.modules, {'ijson': None}):
+            names = [package['name'] for package in api.iter_all_packages()]
+
+        self.assertEqual(names, ['p1', 'p2'])
+        urls.assertAllCalled()
+
+    @unittest.skipIf(ijson is None, 'ijson is not installed')
+    def test_streaming_parse(self):
+        api = Binstar()
+        listing = b'[{"name": "p1"}, {"name": "p2"}]'
+
+        res = requests.models.Response()
+        res.status_code = 200
+        res._content = listing
+        res.raw = RawBody(listing)
+
+        with mock.patch.object(api.session, 'get', return_value=res) as get:
+            names = [package['name'] for package in api.iter_all_packages()]
+
+        self.assertEqual(names, ['p1', 'p2'])
+        # The records must come off the raw stream, with urllib3 asked to
+        # decompress it in-line.
+        self.assertTrue(res.raw.decode_content)
+        self.assertEqual(get.call_count, 1)
+
+
+class TestETagCache(unittest.TestCase):
+    @urlpatch
+    def test_revalidated_hit_returns_fresh_parse(self, urls):
+        api = Binstar()
+        first = urls.register(method='GET', path='/package/u1/p1',
+                              content='{"name": "p1", "access": "public"}',
+                              headers={'ETag': 'abc'})
+
+        package = api.package('u1', 'p1')
+        # Callers mutate these results (e.g. commands/show.py); the cache
+        # must not serve the mutated object back on later hits.
+        package['access'] = 'private'
+
+        revalidated = urls.register(method='GET', path='/package/u1/p1', status=304,
+                                    expected_headers={'If-None-Match': 'abc'})
+
+        cached = api.package('u1', 'p1')
+
+        self.assertIsNot(cached, package)
+        self.assertEqual(cached['access'], 'public')
+        first.assertCalled()
+        revalidated.assertCalled()
+
+
 class Test(unittest.TestCase):
     @urlpatch
     def test_packages_array_param(self, urls):
@@ -33,6 +106,35 @@ class Test(unittest.TestCase):
         self.assertEqual(packages, [])
         urls.assertAllCalled()
 
+    @urlpatch
+    def test_user_packages_full(self, urls):
+        api = Binstar()
+        urls.register(method='GET', path='/packages/u1',
+                      content='[{"name": "p1"}, {"name": "p2"}]')
+        urls.register(method='GET', path='/package/u1/p1',
+                      content='{"name": "p1", "full_name": "u1/p1"}')
+        urls.register(method='GET', path='/package/u1/p2',
+                      content='{"name": "p2", "full_name": "u1/p2"}')
+
+        packages = api.user_packages_full('u1', max_workers=2)
+
+        self.assertEqual([package['full_name'] for package in packages],
+                         ['u1/p1', 'u1/p2'])
+        urls.assertAllCalled()
+
+    @urlpatch
+    def test_user_packages_full_current_user(self, urls):
+        api = Binstar()
+        urls.register(method='GET', path='/user', content='{"login": "u1"}')
+        urls.register(method='GET', path='/packages/u1', content='[{"name": "p1"}]')
+        urls.register(method='GET', path='/package/u1/p1',
+                      content='{"name": "p1", "full_name": "u1/p1"}')
+
+        packages = api.user_packages_full()
+
+        self.assertEqual([package['full_name'] for package in packages], ['u1/p1'])
+        urls.assertAllCalled()
+
 
 if __name__ == '__main__':
     unittest.main()
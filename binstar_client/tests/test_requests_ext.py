@@ -2,6 +2,8 @@
 import io
 import unittest
 
+from collections import OrderedDict
+
 from binstar_client import requests_ext
 
 
@@ -12,5 +14,38 @@ class TestMultiPart(unittest.TestCase):
         self.assertEqual(u'Unicode™'.encode('utf-8'), multipart.read())
 
 
+@unittest.skipIf(requests_ext.MultipartEncoder is None,
+                 'requests_toolbelt is not installed')
+class TestStreamMultipart(unittest.TestCase):
+    def test_field_order_and_int_coercion(self):
+        data = OrderedDict([('Content-Length', 42), ('key', 'value')])
+        body, headers = requests_ext.stream_multipart(
+            data, files={'file': ('spam.txt', io.BytesIO(b'file-data'))})
+
+        self.assertIn('multipart/form-data', headers['Content-Type'])
+
+        raw = body.read()
+        # Integer form values are sent as text.
+        self.assertIn(b'\r\n42\r\n', raw)
+        self.assertIn(b'file-data', raw)
+        # Field order is preserved, with the file part last as S3 expects.
+        self.assertLess(raw.index(b'name="Content-Length"'), raw.index(b'name="key"'))
+        self.assertLess(raw.index(b'name="key"'), raw.index(b'name="file"'))
+
+    def test_callback(self):
+        calls = []
+
+        def callback(bytes_read, total):
+            calls.append((bytes_read, total))
+
+        body, _headers = requests_ext.stream_multipart(
+            {'key': 'value'}, files={'file': ('spam.txt', io.BytesIO(b'file-data'))},
+            callback=callback)
+
+        raw = body.read()
+        self.assertTrue(calls)
+        self.assertEqual(calls[-1], (len(raw), len(raw)))
+
+
 if __name__ == "__main__":
     unittest.main()
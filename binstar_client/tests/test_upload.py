@@ -165,7 +165,7 @@ class Test(CLITestCase):
     def test_upload_project_specifying_token(self, registry):
         registry.register(method='HEAD', path='/', status=200)
         registry.register(method='GET', path='/user/eggs', content='{"login": "eggs"}',
-                          expected_headers={'Authorization':'token abcdefg'})
+                          expected_headers={'Authorization': b'token abcdefg'})
         registry.register(method='GET', path='/user', content='{"login": "eggs"}')
         registry.register(method='GET', path='/apps/eggs/projects/dog', content='{}')
         stage_content = '{"post_url":"http://s3url.com/s3_url", "form_data":{"foo":"bar"}, "dist_id":"dist42"}'
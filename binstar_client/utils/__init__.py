@@ -1,7 +1,5 @@
 from __future__ import print_function, absolute_import, unicode_literals
 
-import base64
-import json
 import logging
 import os
 import sys
@@ -9,6 +7,19 @@ import time
 
 from hashlib import md5
 
+try:
+    # orjson serializes to bytes directly and is several times faster than
+    # the stdlib json module at both encode and decode.
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    from json import dumps as _dumps, loads as _loads
+
+try:
+    # pybase64 dispatches to SIMD (AVX2/SSSE3/NEON) base64 kernels at runtime.
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 # re-export parse_version
 from pkg_resources import parse_version as pv
 from .spec import PackageSpec, package_specs, parse_specs
@@ -25,9 +36,18 @@ from six.moves import input
 logger = logging.getLogger('binstar')
 
 
-def jencode(*E, **F):
-    payload = dict(*E, **F)
-    return json.dumps(payload), {'Content-Type': 'application/json'}
+def _make_jencode(dumps):
+    # Bind the serializer into the closure so each call avoids the global
+    # lookup; jencode runs before every mutating API request.
+    headers = {'Content-Type': 'application/json'}
+
+    def jencode(*E, **F):
+        return dumps(dict(*E, **F)), dict(headers)
+
+    return jencode
+
+
+jencode = _make_jencode(_dumps)
 
 
 def compute_hash(fp, buf_size=8192, size=None, hash_algorithm=md5):
@@ -49,10 +69,7 @@ def compute_hash(fp, buf_size=8192, size=None, hash_algorithm=md5):
             s = fp.read(buf_size)
     hex_digest = hash_obj.hexdigest()
 
-    b64encode = getattr(base64, 'encodebytes', base64.encodestring)
-    base64_digest = b64encode(hash_obj.digest())
-    if base64_digest[-1] == '\n':
-        base64_digest = base64_digest[0:-1]
+    base64_digest = _b64encode(hash_obj.digest())
     # data_size based on bytes read.
     data_size = fp.tell() - spos
     fp.seek(spos)
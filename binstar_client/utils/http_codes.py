@@ -72,3 +72,10 @@ STATUS_CODES = {
           'The gateway server did not receive a timely response'),
     505: ('HTTP Version Not Supported', 'Cannot fulfill request.'),
     }
+
+# Status sets accepted by Binstar._check_response. Frozensets give an O(1)
+# membership test and, used as defaults, avoid the shared-mutable-list trap.
+ALLOWED_OK = frozenset((200,))
+ALLOWED_CREATED = frozenset((201,))
+ALLOWED_NO_CONTENT = frozenset((204,))
+ALLOWED_DOWNLOAD = frozenset((200, 302, 304))
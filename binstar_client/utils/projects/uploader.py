@@ -1,8 +1,9 @@
 from tempfile import SpooledTemporaryFile
-import requests
 import binstar_client
+from binstar_client import _s3_session
 from binstar_client.requests_ext import stream_multipart
 from binstar_client.utils import compute_hash, jencode
+from binstar_client.utils.http_codes import ALLOWED_CREATED
 
 
 class ProjectUploader(binstar_client.Binstar):
@@ -40,7 +41,7 @@ class ProjectUploader(binstar_client.Binstar):
         )
         data, headers = jencode({})
         res = self.session.post(url, data=data, headers=headers)
-        self._check_response(res, [201])
+        self._check_response(res, ALLOWED_CREATED)
         return res
 
     def file_upload(self, url, obj):
@@ -54,7 +55,7 @@ class ProjectUploader(binstar_client.Binstar):
         data_stream, headers = stream_multipart(
             s3data, files={'file': (self.project.basename, self.project.tar)})
 
-        s3res = requests.post(
+        s3res = _s3_session().post(
             url,
             data=data_stream,
             verify=self.session.verify,